@@ -4,17 +4,110 @@
 This tool helps users add integration_type to manifest.json files for integrations
 that have config_flow enabled.
 """
+import functools
 import json
+import os
+import shlex
+import stat
 import subprocess
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Optional
 
+from script import validate_all
+from script.manifest import (
+    INTEGRATION_TYPES,
+    MAX_WORKERS,
+    REQUIRED_FIELDS,
+    REQUIRED_FIELDS_SET,
+    loads,
+    read_bytes,
+    read_bytes_with_stat,
+)
+
+
+def _dumps(data: dict) -> bytes:
+    """Serialize a manifest with 2 space indentation and a trailing newline.
+    
+    This always uses json, orjson formats some floats differently and cannot
+    serialize integers that do not fit in 64 bits.
+    """
+    return (json.dumps(data, indent=2, ensure_ascii=False) + "\n").encode()
+
+
+def _load_manifest(
+    manifest_path: str,
+) -> tuple[Optional[dict], Optional[os.stat_result], Optional[Exception]]:
+    """Load a manifest.json file if it needs an integration_type.
+    
+    Manifests without a config_flow key are skipped with a substring check on
+    the raw bytes, before paying for a full JSON parse.
+    
+    Args:
+        manifest_path: Path to the manifest.json file
+        
+    Returns:
+        Tuple of (data, stat result of the file when it was read, error); data
+        and error are None if the manifest does not need updating
+    """
+    try:
+        raw, file_stat = read_bytes_with_stat(manifest_path)
+    except OSError as e:
+        return None, None, e
+    
+    if b'"config_flow"' not in raw:
+        return None, file_stat, None
+    
+    try:
+        data = loads(raw)
+    except ValueError as e:
+        # JSONDecodeError, or UnicodeDecodeError from json.loads on bytes
+        return None, file_stat, e
+    
+    # Check if config_flow is true and integration_type is missing
+    if (
+        not isinstance(data, dict)
+        or data.get("config_flow") is not True
+        or "integration_type" in data
+    ):
+        return None, file_stat, None
+    
+    # orjson turns integers that do not fit in 64 bits into floats, so decode
+    # manifests that will be rewritten with json to keep their values exact
+    try:
+        return json.loads(raw), file_stat, None
+    except RecursionError as e:
+        return None, file_stat, e
+
+
+@functools.lru_cache(maxsize=1024)
+def _read_manifest_cached(manifest_path: str, mtime_ns: int, size: int) -> dict:
+    """Parse a manifest.json file, cached on its path, mtime and size.
+    
+    The returned dict is shared between callers and must not be modified.
+    """
+    return loads(read_bytes(manifest_path))
+
+
+def _read_manifest(manifest_path: Path) -> dict:
+    """Parse a manifest.json file, reusing the result while the file is unchanged.
+    
+    Args:
+        manifest_path: Path to the manifest.json file
+        
+    Returns:
+        The parsed manifest, which must not be modified
+    """
+    file_stat = os.stat(manifest_path)
+    return _read_manifest_cached(str(manifest_path), file_stat.st_mtime_ns, file_stat.st_size)
+
 
 class ManifestManager:
     """Manages manifest.json files for integrations."""
     
-    INTEGRATION_TYPES = ["device", "service", "hub"]
+    # Shared with the validator in script.manifest so the two cannot drift apart
+    INTEGRATION_TYPES = INTEGRATION_TYPES
     
     def __init__(self, repo_root: Path):
         """Initialize the manifest manager.
@@ -24,12 +117,19 @@ class ManifestManager:
         """
         self.repo_root = repo_root
         self.integrations_dir = repo_root / "integrations"
+        # All manifest.json files found by the last scan, reused by the full validation.
+        # The scan must find the same files as glob("*/manifest.json") in validate_all,
+        # so the tool validates exactly what python -m script does.
+        self._all_paths: Optional[list[Path]] = None
+        # (st_mtime_ns, st_size) of the manifests returned by the last scan, used to
+        # notice edits made while the user answers the prompts
+        self._scanned_stats: dict[Path, tuple[int, int]] = {}
     
-    def find_manifests_needing_update(self) -> list[Path]:
+    def find_manifests_needing_update(self) -> list[tuple[Path, dict]]:
         """Find all manifest.json files that have config_flow but no integration_type.
         
         Returns:
-            List of paths to manifest.json files that need updating
+            List of (path, data) tuples for the manifest.json files that need updating
         """
         manifests_to_update = []
         
@@ -37,17 +137,30 @@ class ManifestManager:
             print(f"Error: Integrations directory not found at {self.integrations_dir}")
             return []
         
-        for manifest_path in self.integrations_dir.glob("*/manifest.json"):
-            try:
-                with open(manifest_path) as f:
-                    data = json.load(f)
+        manifest_paths = []
+        with os.scandir(self.integrations_dir) as entries:
+            for entry in entries:
+                # The dirent type is reused, only symlinks need an extra stat
+                if entry.is_dir():
+                    manifest_paths.append(os.path.join(entry.path, "manifest.json"))
+        
+        # Reading and parsing is I/O bound, so overlap it across threads
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+            results = executor.map(_load_manifest, manifest_paths)
+            all_paths = []
+            for manifest_path, (data, file_stat, error) in zip(manifest_paths, results):
+                if isinstance(error, FileNotFoundError):
+                    # Not an integration directory
+                    continue
+                all_paths.append(Path(manifest_path))
                 
-                # Check if config_flow is true and integration_type is missing
-                if data.get("config_flow") is True and "integration_type" not in data:
-                    manifests_to_update.append(manifest_path)
-            except Exception as e:
-                print(f"Warning: Could not read {manifest_path}: {e}")
+                if error is not None:
+                    print(f"Warning: Could not read {manifest_path}: {error}")
+                elif data is not None:
+                    manifests_to_update.append((all_paths[-1], data))
+                    self._scanned_stats[all_paths[-1]] = (file_stat.st_mtime_ns, file_stat.st_size)
         
+        self._all_paths = all_paths
         return manifests_to_update
     
     def prompt_for_integration_type(self, integration_name: str) -> Optional[str]:
@@ -79,136 +192,316 @@ class ManifestManager:
             else:
                 print("Invalid choice. Please enter 1 (device), 2 (service), 3 (hub), or 0 (skip)")
     
-    def update_manifest(self, manifest_path: Path, integration_type: str) -> bool:
+    def update_manifest(
+        self, manifest_path: Path, data: dict, integration_type: str
+    ) -> Optional[dict]:
         """Update a manifest.json file with the integration_type.
         
         The integration_type is inserted in alphabetical order, ignoring domain and name keys.
         
         Args:
             manifest_path: Path to the manifest.json file
+            data: Parsed contents of the manifest, modified in place. The file is
+                parsed again if it changed since `find_manifests_needing_update`
+                read it, or if it was not returned by that scan
             integration_type: Type to add (device, service, or hub)
             
         Returns:
-            True if successful, False otherwise
+            The updated manifest data, or None if the update failed
         """
         try:
-            with open(manifest_path) as f:
-                data = json.load(f)
+            # Don't overwrite edits made to the manifest since it was scanned
+            file_stat = os.stat(manifest_path)
+            if self._scanned_stats.get(manifest_path) != (file_stat.st_mtime_ns, file_stat.st_size):
+                data = json.loads(read_bytes(manifest_path))
             
             # Add integration_type
             data["integration_type"] = integration_type
             
             # Sort keys alphabetically, but keep domain and name at the top
-            sorted_data = {}
+            keys = sorted(data)
+            for first in ("name", "domain"):
+                if first in data:
+                    keys.remove(first)
+                    keys.insert(0, first)
             
-            # Add domain and name first if they exist
-            if "domain" in data:
-                sorted_data["domain"] = data.pop("domain")
-            if "name" in data:
-                sorted_data["name"] = data.pop("name")
+            # Re-inserting a key moves it to the end, so this reorders data in place
+            for key in keys:
+                data[key] = data.pop(key)
             
-            # Add remaining keys in alphabetical order
-            for key in sorted(data.keys()):
-                sorted_data[key] = data[key]
-            
-            # Write back to file with proper formatting
-            with open(manifest_path, 'w') as f:
-                json.dump(sorted_data, f, indent=2, ensure_ascii=False)
-                f.write('\n')  # Add trailing newline
+            # Write to a temporary file and swap it in, so readers never see a partial manifest.
+            # A symlinked manifest is updated at its target so the link itself is kept.
+            target_path = Path(os.path.realpath(manifest_path))
+            tmp_path = target_path.with_name(target_path.name + ".tmp")
+            try:
+                with open(tmp_path, "wb") as f:
+                    f.write(_dumps(data))
+                os.chmod(tmp_path, stat.S_IMODE(os.stat(target_path).st_mode))
+                os.replace(tmp_path, target_path)
+            except BaseException:
+                tmp_path.unlink(missing_ok=True)
+                raise
             
-            return True
+            return data
         except Exception as e:
             print(f"Error updating {manifest_path}: {e}")
-            return False
+            return None
     
-    def validate_manifest(self, manifest_path: Path) -> bool:
+    def validate_manifest(self, manifest_path: Path, data: Optional[dict] = None) -> bool:
         """Validate a manifest file.
         
         Args:
             manifest_path: Path to the manifest.json file
+            data: Parsed contents of the manifest, read from disk if not given
             
         Returns:
             True if validation passed, False otherwise
         """
-        try:
-            with open(manifest_path) as f:
-                data = json.load(f)
-        except json.JSONDecodeError as e:
-            print(f"✗ Invalid JSON: {e}")
-            return False
-        except Exception as e:
-            print(f"✗ Error reading file: {e}")
+        if data is None:
+            try:
+                data = _read_manifest(manifest_path)
+            except ValueError as e:
+                # JSONDecodeError, or UnicodeDecodeError from json.loads on bytes
+                print(f"✗ Invalid JSON: {e}")
+                return False
+            except OSError as e:
+                print(f"✗ Error reading file: {e}")
+                return False
+        
+        if not isinstance(data, dict):
+            print("✗ Manifest must be a JSON object")
             return False
         
         # Required fields
-        required_fields = ["domain", "name", "documentation", "requirements"]
-        for field in required_fields:
-            if field not in data:
-                print(f"✗ Missing required field: {field}")
-                return False
+        missing = REQUIRED_FIELDS_SET.difference(data)
+        if missing:
+            field = next(field for field in REQUIRED_FIELDS if field in missing)
+            print(f"✗ Missing required field: {field}")
+            return False
         
         # Validate integration_type if present
-        if "integration_type" in data:
-            if data["integration_type"] not in self.INTEGRATION_TYPES:
-                print(f"✗ Invalid integration_type: {data['integration_type']}")
+        has_integration_type = "integration_type" in data
+        if has_integration_type:
+            integration_type = data["integration_type"]
+            if (
+                not isinstance(integration_type, str)
+                or integration_type not in self.INTEGRATION_TYPES
+            ):
+                print(f"✗ Invalid integration_type: {integration_type}")
                 return False
         
         # Check if config_flow requires integration_type
-        if data.get("config_flow") is True and "integration_type" not in data:
+        if not has_integration_type and data.get("config_flow") is True:
             print("✗ Manifest with config_flow: true must have integration_type")
             return False
         
         print("✓ Validation passed")
         return True
     
-    def commit_changes(self, manifest_path: Path, integration_name: str) -> bool:
-        """Commit changes to git.
+    def _open_git_worker(self) -> Optional[subprocess.Popen]:
+        """Start a long-running shell that executes git commands read from stdin.
         
-        Args:
-            manifest_path: Path to the manifest.json file
-            integration_name: Name of the integration
-            
         Returns:
-            True if successful, False otherwise
+            The worker process, or None if it could not be started
         """
         try:
-            # Stage the file
-            subprocess.run(
-                ["git", "add", str(manifest_path)],
+            return subprocess.Popen(
+                ["sh", "-s"],
                 cwd=self.repo_root,
-                check=True,
-                capture_output=True
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                text=True,
+                # Keep Ctrl-C at a prompt from killing the worker before it commits
+                start_new_session=True
             )
+        except OSError as e:
+            print(f"Warning: Could not start git worker, falling back to per-call git: {e}")
+            return None
+    
+    def stage_changes(self, worker: subprocess.Popen, manifest_path: Path) -> None:
+        """Stage a manifest through the git worker.
+        
+        The command is flushed right away so staging overlaps with the prompts.
+        Failures are reported when the worker is closed in `commit_changes_batch`.
+        
+        Args:
+            worker: Worker returned by `_open_git_worker`
+            manifest_path: Path to the manifest.json file
+        """
+        relative_path = os.path.relpath(manifest_path, self.repo_root)
+        try:
+            worker.stdin.write(f"git add -- {shlex.quote(relative_path)} || exit 1\n")
+            worker.stdin.flush()
+        except OSError:
+            # The worker has exited, the error is reported on close
+            pass
+    
+    def _commit_script(self, pairs: list[tuple[Path, str]]) -> str:
+        """Build a shell script committing each staged manifest on its own.
+        
+        The script echoes a status marker per pair for `_report_commit_results`,
+        and a failing commit does not stop the others from being attempted.
+        
+        Args:
+            pairs: List of (manifest_path, integration_name) tuples
             
-            # Check if there are changes to commit
-            status_result = subprocess.run(
-                ["git", "diff", "--cached", "--quiet", str(manifest_path)],
-                cwd=self.repo_root,
-                capture_output=True
+        Returns:
+            The shell script
+        """
+        script = []
+        for index, (manifest_path, integration_name) in enumerate(pairs):
+            relative_path = shlex.quote(os.path.relpath(manifest_path, self.repo_root))
+            commit_message = shlex.quote(
+                f"Add integration_type to `manifest.json` for {integration_name}"
             )
+            script.append(
+                f"if git diff --cached --quiet -- {relative_path}; then echo unchanged {index}; "
+                f"elif git commit -q -m {commit_message} -- {relative_path}; then echo committed {index}; "
+                f"else echo failed {index}; fi\n"
+            )
+        return "".join(script)
+    
+    def _report_commit_results(self, pairs: list[tuple[Path, str]], output: str) -> int:
+        """Print the per-integration results of a batch of commits.
+        
+        The commit scripts echo `committed <index>`, `unchanged <index>` or
+        `failed <index>` for each pair; pairs without a marker did not run.
+        
+        Args:
+            pairs: List of (manifest_path, integration_name) tuples
+            output: Standard output of the commit script
             
-            # If exit code is 0, there are no changes
-            if status_result.returncode == 0:
+        Returns:
+            Number of pairs that were committed or had nothing to commit
+        """
+        statuses = {}
+        for line in output.splitlines():
+            status, _, index = line.partition(" ")
+            statuses[int(index)] = status
+        
+        succeeded = 0
+        for index, (_, integration_name) in enumerate(pairs):
+            status = statuses.get(index)
+            if status == "committed":
+                print(f"✓ Committed changes for {integration_name}")
+                succeeded += 1
+            elif status == "unchanged":
                 print(f"ℹ No changes to commit for {integration_name} (already up to date)")
-                return True
+                succeeded += 1
+            else:
+                print(f"✗ Could not commit changes for {integration_name}")
+        return succeeded
+    
+    def _commit_with_worker(
+        self, worker: subprocess.Popen, pairs: list[tuple[Path, str]]
+    ) -> int:
+        """Send the commit commands to the git worker and wait for it to finish.
+        
+        Args:
+            worker: Worker returned by `_open_git_worker`
+            pairs: List of (manifest_path, integration_name) tuples
             
-            # Commit with message
-            commit_message = f"Add integration_type to `manifest.json` for {integration_name}"
+        Returns:
+            Number of pairs that were committed or had nothing to commit
+        """
+        try:
+            stdout, stderr = worker.communicate(self._commit_script(pairs))
+        except OSError:
+            # The worker has exited, collect whatever it left behind
+            stdout, stderr = worker.communicate()
+        
+        succeeded = self._report_commit_results(pairs, stdout)
+        
+        if worker.returncode != 0:
+            print(f"Error committing changes: git worker exited with status {worker.returncode}")
+        if succeeded < len(pairs) and stderr:
+            print(stderr)
+        return succeeded
+    
+    def commit_changes_batch(
+        self,
+        pairs: list[tuple[Path, str]],
+        worker: Optional[subprocess.Popen] = None
+    ) -> int:
+        """Commit changes to git, one commit per integration.
+        
+        When a git worker is given the manifests are expected to be staged
+        already, and the commits are run by the worker before it is closed.
+        Otherwise there is no shell to rely on: all manifests are staged with a
+        single `git add`, and git is called directly for each commit.
+        
+        Args:
+            pairs: List of (manifest_path, integration_name) tuples
+            worker: Optional worker returned by `_open_git_worker`
+            
+        Returns:
+            Number of pairs that were committed or had nothing to commit
+        """
+        if worker is not None:
+            return self._commit_with_worker(worker, pairs)
+        
+        if not pairs:
+            return 0
+        
+        paths = [str(manifest_path) for manifest_path, _ in pairs]
+        try:
+            # Stage all files at once
             subprocess.run(
-                ["git", "commit", "-m", commit_message],
+                ["git", "add", "--"] + paths,
                 cwd=self.repo_root,
                 check=True,
                 capture_output=True,
                 text=True
             )
             
-            print(f"✓ Committed changes for {integration_name}")
-            return True
-        except subprocess.CalledProcessError as e:
+            # Find out which of the staged files actually have changes
+            diff_result = subprocess.run(
+                ["git", "diff", "--cached", "--name-only", "--relative", "-z", "--"] + paths,
+                cwd=self.repo_root,
+                check=True,
+                capture_output=True,
+                text=True
+            )
+        except (OSError, subprocess.CalledProcessError) as e:
             print(f"Error committing changes: {e}")
-            if e.stderr:
+            if isinstance(e, subprocess.CalledProcessError) and e.stderr:
                 print(e.stderr)
-            return False
+            for _, integration_name in pairs:
+                print(f"✗ Could not commit changes for {integration_name}")
+            return 0
+        changed = set(diff_result.stdout.split("\0"))
+        
+        succeeded = 0
+        for manifest_path, integration_name in pairs:
+            relative_path = os.path.relpath(manifest_path, self.repo_root)
+            if Path(relative_path).as_posix() not in changed:
+                print(f"ℹ No changes to commit for {integration_name} (already up to date)")
+                succeeded += 1
+                continue
+            
+            # Commit with message
+            commit_message = f"Add integration_type to `manifest.json` for {integration_name}"
+            try:
+                subprocess.run(
+                    ["git", "commit", "-q", "-m", commit_message, "--", relative_path],
+                    cwd=self.repo_root,
+                    check=True,
+                    capture_output=True,
+                    text=True
+                )
+            except subprocess.CalledProcessError as e:
+                print(f"✗ Could not commit changes for {integration_name}")
+                if e.stderr:
+                    print(e.stderr)
+                continue
+            except OSError as e:
+                print(f"✗ Could not commit changes for {integration_name}: {e}")
+                continue
+            
+            print(f"✓ Committed changes for {integration_name}")
+            succeeded += 1
+        return succeeded
     
     def run_full_validation(self) -> bool:
         """Run the full hassfest validation on all manifests.
@@ -217,19 +510,7 @@ class ManifestManager:
             True if validation passed, False otherwise
         """
         try:
-            result = subprocess.run(
-                [sys.executable, "-m", "script"],
-                cwd=self.repo_root,
-                capture_output=True,
-                text=True,
-                timeout=30
-            )
-            
-            print(result.stdout)
-            if result.stderr:
-                print(result.stderr)
-            
-            return result.returncode == 0
+            return validate_all(self.repo_root, manifests=self._all_paths) == 0
         except Exception as e:
             print(f"Error running validation: {e}")
             return False
@@ -250,49 +531,64 @@ class ManifestManager:
             return 0
         
         print(f"Found {len(manifests)} manifest(s) that need integration_type added:")
-        for manifest in manifests:
-            print(f"  - {manifest.parent.name}")
+        for manifest_path, _ in manifests:
+            print(f"  - {manifest_path.parent.name}")
         print()
         
         # Process each manifest
         updated_count = 0
         skipped_count = 0
         failed_count = 0
+        to_commit = []
+        worker = self._open_git_worker()
+        
+        interrupted = False
         
-        for manifest_path in manifests:
-            integration_name = manifest_path.parent.name
+        try:
+            for manifest_path, data in manifests:
+                integration_name = manifest_path.parent.name
+                print("-" * 70)
+                
+                # Prompt for integration type
+                integration_type = self.prompt_for_integration_type(integration_name)
+                
+                if integration_type is None:
+                    print(f"Skipping {integration_name}")
+                    skipped_count += 1
+                    continue
+                
+                print(f"Setting integration_type to '{integration_type}' for {integration_name}")
+                
+                # Update the manifest
+                updated_data = self.update_manifest(manifest_path, data, integration_type)
+                if updated_data is None:
+                    failed_count += 1
+                    continue
+                
+                print(f"✓ Updated {manifest_path}")
+                
+                # Validate the manifest, reusing the data that was just written
+                if not self.validate_manifest(manifest_path, data=updated_data):
+                    print(f"Warning: Validation failed for {integration_name}")
+                    print("The file has been updated but may have issues.")
+                    failed_count += 1
+                    continue
+                
+                if worker is not None:
+                    self.stage_changes(worker, manifest_path)
+                to_commit.append((manifest_path, integration_name))
+        except (EOFError, KeyboardInterrupt):
+            # Still commit the integrations that were already updated
+            print()
+            print("Interrupted, committing the changes made so far")
+            interrupted = True
+        
+        # Commit all the changes in one batch
+        if to_commit:
             print("-" * 70)
-            
-            # Prompt for integration type
-            integration_type = self.prompt_for_integration_type(integration_name)
-            
-            if integration_type is None:
-                print(f"Skipping {integration_name}")
-                skipped_count += 1
-                continue
-            
-            print(f"Setting integration_type to '{integration_type}' for {integration_name}")
-            
-            # Update the manifest
-            if not self.update_manifest(manifest_path, integration_type):
-                failed_count += 1
-                continue
-            
-            print(f"✓ Updated {manifest_path}")
-            
-            # Validate the manifest
-            if not self.validate_manifest(manifest_path):
-                print(f"Warning: Validation failed for {integration_name}")
-                print("The file has been updated but may have issues.")
-                failed_count += 1
-                continue
-            
-            # Commit the changes
-            if not self.commit_changes(manifest_path, integration_name):
-                failed_count += 1
-                continue
-            
-            updated_count += 1
+        committed_count = self.commit_changes_batch(to_commit, worker)
+        updated_count += committed_count
+        failed_count += len(to_commit) - committed_count
         
         # Print summary
         print()
@@ -306,14 +602,14 @@ class ManifestManager:
         # Run full validation if any updates were made
         if updated_count > 0:
             print()
-            print("Running full validation with python3 -m script.hassfest...")
+            print("Running full validation of all manifests...")
             print()
             if not self.run_full_validation():
                 print()
                 print("Warning: Full validation failed. Please review the errors above.")
                 return 1
         
-        return 0 if failed_count == 0 else 1
+        return 0 if failed_count == 0 and not interrupted else 1
 
 
 def main():
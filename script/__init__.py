@@ -1 +1,4 @@
 """Home Assistant manifest validation tools."""
+from .manifest import validate_all, validate_manifest
+
+__all__ = ["validate_all", "validate_manifest"]
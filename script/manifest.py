@@ -0,0 +1,186 @@
+"""Validation of Home Assistant manifest files."""
+import json
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Optional
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+__all__ = [
+    "INTEGRATION_TYPES",
+    "MAX_WORKERS",
+    "REQUIRED_FIELDS",
+    "REQUIRED_FIELDS_SET",
+    "loads",
+    "read_bytes",
+    "read_bytes_with_stat",
+    "validate_all",
+    "validate_manifest",
+]
+
+# Number of threads used to read and validate manifests concurrently
+MAX_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+
+
+# Allowed integration_type values
+INTEGRATION_TYPES = frozenset({"device", "service", "hub"})
+_INTEGRATION_TYPES_DISPLAY = "['device', 'service', 'hub']"
+
+# Fields every manifest must have, in the order they are reported
+REQUIRED_FIELDS = ("domain", "name", "documentation", "requirements")
+REQUIRED_FIELDS_SET = frozenset(REQUIRED_FIELDS)
+
+# Keys that stay at the top of a manifest instead of being sorted
+_SPECIAL_KEYS = frozenset({"domain", "name"})
+
+
+def read_bytes_with_stat(path) -> tuple[bytes, os.stat_result]:
+    """Read a whole file with a single read sized from fstat.
+    
+    This avoids the buffered file object and incremental reads of open().
+    
+    Args:
+        path: Path to the file
+        
+    Returns:
+        Tuple of (contents, stat result taken just before reading)
+    """
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        file_stat = os.fstat(fd)
+        size = file_stat.st_size
+        data = os.read(fd, size)
+        # Reads can come up short, keep going until the expected size is read
+        while len(data) < size:
+            chunk = os.read(fd, size - len(data))
+            if not chunk:
+                break
+            data += chunk
+        return data, file_stat
+    finally:
+        os.close(fd)
+
+
+def read_bytes(path) -> bytes:
+    """Read a whole file with a single read sized from fstat."""
+    return read_bytes_with_stat(path)[0]
+
+
+def loads(data: bytes):
+    """Parse JSON from bytes, using orjson when it is installed.
+    
+    orjson is much faster than json, but it rejects input that json accepts,
+    such as NaN and Infinity. Those manifests are parsed again with json so
+    the result does not depend on whether orjson is installed.
+    """
+    if orjson is not None:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            pass
+    try:
+        return json.loads(data)
+    except RecursionError as e:
+        # Report deeply nested manifests like any other invalid JSON
+        raise ValueError(f"Manifest is nested too deeply: {e}") from e
+
+
+def validate_manifest(manifest_path: Path) -> tuple[bool, str]:
+    """Validate a manifest.json file.
+    
+    Args:
+        manifest_path: Path to the manifest.json file
+        
+    Returns:
+        Tuple of (is_valid, error_message)
+    """
+    try:
+        data = loads(read_bytes(manifest_path))
+    except ValueError as e:
+        # JSONDecodeError, or UnicodeDecodeError from json.loads on bytes
+        return False, f"Invalid JSON: {e}"
+    except OSError as e:
+        return False, f"Error reading file: {e}"
+    
+    if not isinstance(data, dict):
+        return False, "Manifest must be a JSON object"
+    
+    # Required fields
+    missing = REQUIRED_FIELDS_SET.difference(data)
+    if missing:
+        field = next(field for field in REQUIRED_FIELDS if field in missing)
+        return False, f"Missing required field: {field}"
+    
+    # Validate integration_type if present
+    has_integration_type = "integration_type" in data
+    if has_integration_type:
+        integration_type = data["integration_type"]
+        if not isinstance(integration_type, str) or integration_type not in INTEGRATION_TYPES:
+            return False, f"Invalid integration_type: {integration_type}. Must be one of {_INTEGRATION_TYPES_DISPLAY}"
+    
+    # Check if config_flow requires integration_type
+    if not has_integration_type and data.get("config_flow") is True:
+        return False, "Manifest with config_flow: true must have integration_type"
+    
+    # Validate JSON structure (keys should be sorted except domain and name)
+    previous_key = ""
+    for key in data:
+        if key in _SPECIAL_KEYS:
+            continue
+        if key < previous_key:
+            # Only build the expected order when reporting the error
+            special_keys = [k for k in data if k in _SPECIAL_KEYS]
+            other_keys = sorted(k for k in data if k not in _SPECIAL_KEYS)
+            return False, f"Keys must be in alphabetical order (except domain and name). Expected: {special_keys + other_keys}"
+        previous_key = key
+    
+    return True, "Validation successful"
+
+
+def validate_all(repo_root: Path, manifests: Optional[list[Path]] = None) -> int:
+    """Validate all manifest.json files and print the results.
+    
+    Args:
+        repo_root: Root directory of the repository
+        manifests: Paths to the manifest.json files, found under repo_root if not given
+        
+    Returns:
+        Exit code, 0 if all manifests are valid and 1 otherwise
+    """
+    if manifests is None:
+        # Find all manifest.json files
+        manifests = list(repo_root.glob("integrations/*/manifest.json"))
+    
+    if not manifests:
+        print("No manifest files found")
+        return 0
+    
+    print(f"Validating {len(manifests)} manifest files...")
+    errors = []
+    
+    # Validation is I/O bound, results are printed in order to keep output stable
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        results = list(executor.map(validate_manifest, manifests))
+    
+    # Collect the output and write it at once instead of printing per manifest
+    lines = []
+    for manifest_path, (is_valid, message) in zip(manifests, results):
+        if not is_valid:
+            errors.append(f"{manifest_path.parent.name}: {message}")
+            lines.append(f"❌ {manifest_path.parent.name}: {message}\n")
+        else:
+            lines.append(f"✓ {manifest_path.parent.name}: {message}\n")
+    
+    if errors:
+        lines.append(f"\n{len(errors)} validation error(s) found\n")
+        sys.stdout.writelines(lines)
+        return 1
+    
+    lines.append(f"\n✓ All {len(manifests)} manifests are valid\n")
+    sys.stdout.writelines(lines)
+    return 0